@@ -66,6 +66,10 @@ class Config:
     TEXT_MODEL = os.getenv('TEXT_MODEL', 'gemini-3-flash-preview')
     IMAGE_MODEL = os.getenv('IMAGE_MODEL', 'gemini-3-pro-image-preview')
 
+    # Gemini 显式上下文缓存配置（缓存静态指令 + 参考文件前缀，逐页生成时只发送动态内容）
+    TEXT_CONTEXT_CACHE_TTL = int(os.getenv('TEXT_CONTEXT_CACHE_TTL', '600'))  # 秒，设为 0 可禁用
+    TEXT_CONTEXT_CACHE_MIN_CHARS = int(os.getenv('TEXT_CONTEXT_CACHE_MIN_CHARS', '32768'))  # 前缀短于该长度时不创建缓存
+
     # MinerU 文件解析服务配置
     MINERU_TOKEN = os.getenv('MINERU_TOKEN', '')
     MINERU_API_BASE = os.getenv('MINERU_API_BASE', 'https://mineru.net')
@@ -2,19 +2,25 @@
 Abstract base class for text generation providers
 """
 from abc import ABC, abstractmethod
+from typing import List, Union
 
 
 class TextProvider(ABC):
     """Abstract base class for text generation"""
     
     @abstractmethod
-    def generate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+    def generate_text(self, prompt: Union[str, List[str]], thinking_budget: int = 1000,
+                      cache_prefix: bool = False) -> str:
         """
         Generate text content from prompt
         
         Args:
-            prompt: The input prompt for text generation
+            prompt: The input prompt for text generation. A list of strings is
+                    one prompt split into segments (their concatenation is the full
+                    prompt); providers may send them as parts of a single user message
             thinking_budget: Budget for thinking/reasoning (provider-specific)
+            cache_prefix: Hint that every segment but the last is reused by upcoming
+                          calls, so the provider may cache it explicitly (provider-specific)
             
         Returns:
             Generated text content
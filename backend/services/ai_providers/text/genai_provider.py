@@ -5,9 +5,14 @@ Supports two modes:
 - Google AI Studio: Uses API key authentication
 - Vertex AI: Uses GCP service account authentication
 """
+import hashlib
 import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple, Union
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 from tenacity import retry, stop_after_attempt, wait_exponential
 from .base import TextProvider
 from config import get_config
@@ -15,6 +20,16 @@ from config import get_config
 logger = logging.getLogger(__name__)
 
 
+def _is_missing_cached_content(error: Exception) -> bool:
+    """判断请求失败是否因为 cached content 已过期或被删除（限流、超时等其他错误不算）"""
+    if not isinstance(error, errors.ClientError):
+        return False
+    if error.code == 404:
+        return True
+    message = (error.message or '').replace(' ', '').lower()
+    return error.code in (400, 403) and 'cachedcontent' in message
+
+
 class GenAITextProvider(TextProvider):
     """Text generation using Google GenAI SDK (supports both AI Studio and Vertex AI)"""
 
@@ -62,30 +77,144 @@ class GenAITextProvider(TextProvider):
             )
 
         self.model = model
+
+        # 显式上下文缓存：前缀哈希 -> (cached content 名称的 Future, 过期时间)
+        # cached content 归属于创建它的 API key / 项目 / 代理，因此按 client 实例保存，
+        # 修改设置后重建的 provider 不会沿用其他账号的缓存。
+        # 创建期间过期时间为 inf，同一前缀的其他调用等待该 Future；其他前缀的调用不受影响。
+        # 名称为 None 表示该前缀创建缓存失败（如代理不支持 caches 接口），过期前直接发送完整 prompt
+        self._context_caches: Dict[str, Tuple["Future[Optional[str]]", float]] = {}
+        self._context_caches_lock = threading.Lock()
     
     @retry(
         stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
         wait=wait_exponential(multiplier=1, min=2, max=10)
     )
-    def generate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+    def generate_text(self, prompt: Union[str, List[str]], thinking_budget: int = 1000,
+                      cache_prefix: bool = False) -> str:
         """
         Generate text using Google GenAI SDK
         
         Args:
-            prompt: The input prompt
+            prompt: The input prompt, or a list of prompt segments (sent as parts of one user turn)
             thinking_budget: Thinking budget for the model
+            cache_prefix: Every segment but the last is reused by upcoming calls; store it as an
+                          explicit context cache and only send the last segment
             
         Returns:
             Generated text
         """
-        response = self.client.models.generate_content(
-            model=self.model,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget),
-            ),
-        )
+        contents = prompt
+        cache_key = cached_content = None
+        if cache_prefix and not isinstance(prompt, str) and len(prompt) > 1:
+            cache_key, cached_content = self._get_cached_content(prompt[:-1])
+            if cached_content:
+                contents = prompt[-1]
+
+        try:
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=contents,
+                config=types.GenerateContentConfig(
+                    thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget),
+                    cached_content=cached_content,
+                ),
+            )
+        except Exception as e:
+            # 缓存不可用时，重试和同一前缀的其他页面改为发送完整 prompt；
+            # 限流、超时等错误由重试继续复用同一份缓存
+            if cached_content and _is_missing_cached_content(e):
+                self._disable_cached_content(cache_key, cached_content)
+            raise
+
+        usage = response.usage_metadata
+        if usage is not None:
+            logger.debug(
+                f"GenAI text usage: prompt_tokens={usage.prompt_token_count}, "
+                f"cached_tokens={usage.cached_content_token_count or 0}"
+            )
         return response.text
+
+    def _get_cached_content(self, prefix: List[str]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        获取 prompt 前缀对应的显式上下文缓存
+
+        同一项目逐页生成时静态指令和参考文件完全相同，首次调用时创建缓存，
+        之后的调用只发送动态内容。前缀过短、缓存被禁用或创建失败时不使用缓存。
+
+        Args:
+            prefix: prompt 前缀片段（静态指令 + 参考文件）
+
+        Returns:
+            (缓存键, cached content 名称)；不使用缓存时名称为 None
+        """
+        config = get_config()
+        ttl = config.TEXT_CONTEXT_CACHE_TTL
+        if ttl <= 0 or sum(len(part) for part in prefix) < config.TEXT_CONTEXT_CACHE_MIN_CHARS:
+            return None, None
+
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(self.model.encode('utf-8'))
+        for part in prefix:
+            hasher.update(b'\0')
+            hasher.update(part.encode('utf-8'))
+        cache_key = hasher.hexdigest()
+
+        # 锁只用于查找和占位，创建缓存的网络请求在锁外进行
+        with self._context_caches_lock:
+            now = time.monotonic()
+            # 顺带清理已过期的条目，避免不再使用的前缀长期占用内存
+            for key in [key for key, (_, expiry) in self._context_caches.items() if expiry <= now]:
+                del self._context_caches[key]
+
+            entry = self._context_caches.get(cache_key)
+            if entry is not None:
+                future = entry[0]
+                is_creator = False
+            else:
+                future = Future()
+                self._context_caches[cache_key] = (future, float('inf'))
+                is_creator = True
+
+        if not is_creator:
+            return cache_key, future.result()
+
+        name = None
+        try:
+            cached = self.client.caches.create(
+                model=self.model,
+                config=types.CreateCachedContentConfig(contents=prefix, ttl=f"{ttl}s"),
+            )
+            name = cached.name
+            logger.info(f"Created GenAI context cache {name} for model {self.model}, ttl={ttl}s")
+        except Exception as e:
+            logger.warning(f"Failed to create GenAI context cache, sending full prompt instead: {e}")
+        finally:
+            # 提前视为过期，避免请求时缓存恰好在服务端失效
+            with self._context_caches_lock:
+                if cache_key in self._context_caches and self._context_caches[cache_key][0] is future:
+                    self._context_caches[cache_key] = (future, time.monotonic() + ttl - min(60, ttl // 2))
+            future.set_result(name)
+        return cache_key, name
+
+    def _disable_cached_content(self, cache_key: str, name: str) -> None:
+        """
+        缓存在请求时已不可用：在原过期时间前改为发送完整 prompt，并删除服务端的 cached content
+
+        条目本身会提前过期，请求时仍找不到缓存说明它对当前 client 不可用
+        （如代理在多个上游 key 之间轮换），重新创建只会产生更多计费的缓存
+        """
+        with self._context_caches_lock:
+            entry = self._context_caches.get(cache_key)
+            if entry is not None and entry[0].done() and entry[0].result() == name:
+                disabled = Future()
+                disabled.set_result(None)
+                self._context_caches[cache_key] = (disabled, entry[1])
+
+        try:
+            self.client.caches.delete(name=name)
+        except Exception as e:
+            logger.debug(f"Failed to delete GenAI context cache {name}: {e}")
     
     @retry(
         stop=stop_after_attempt(get_config().GENAI_MAX_RETRIES + 1),
@@ -2,6 +2,7 @@
 OpenAI SDK implementation for text generation
 """
 import logging
+from typing import List, Union
 from openai import OpenAI
 from .base import TextProvider
 from config import get_config
@@ -29,21 +30,34 @@ class OpenAITextProvider(TextProvider):
         )
         self.model = model
     
-    def generate_text(self, prompt: str, thinking_budget: int = 1000) -> str:
+    def generate_text(self, prompt: Union[str, List[str]], thinking_budget: int = 1000,
+                      cache_prefix: bool = False) -> str:
         """
         Generate text using OpenAI SDK
         
         Args:
-            prompt: The input prompt
+            prompt: The input prompt, or a list of prompt segments (joined into one string, since
+                    some OpenAI-compatible backends only accept string content)
             thinking_budget: Not used in OpenAI format, kept for interface compatibility
+            cache_prefix: Not used in OpenAI format, identical prefixes are cached automatically
             
         Returns:
             Generated text
         """
+        content = prompt if isinstance(prompt, str) else ''.join(prompt)
+        
         response = self.client.chat.completions.create(
             model=self.model,
             messages=[
-                {"role": "user", "content": prompt}
+                {"role": "user", "content": content}
             ]
         )
+        # prompt 以静态指令和参考文件开头，服务端会自动做前缀缓存，这里记录命中情况
+        usage = response.usage
+        if usage is not None:
+            details = getattr(usage, 'prompt_tokens_details', None)
+            logger.debug(
+                f"OpenAI text usage: prompt_tokens={usage.prompt_tokens}, "
+                f"cached_tokens={getattr(details, 'cached_tokens', None) or 0}"
+            )
         return response.choices[0].message.content
@@ -4,6 +4,7 @@ Based on demo.py and gemini_genai.py
 TODO: use structured output API
 """
 import os
+import sys
 import json
 import re
 import logging
@@ -52,7 +53,16 @@ class ProjectContext:
             self.description_text = project_or_dict.get('description_text')
             self.creation_type = project_or_dict.get('creation_type', 'idea')
         
+        # 数据库/请求中读出的 creation_type 是新建的字符串；驻留后与 prompts 中的
+        # 字面量常量是同一对象，按 creation_type 查表时可直接按身份命中
+        if self.creation_type:
+            self.creation_type = sys.intern(self.creation_type)
+        
         self.reference_files_content = reference_files_content or []
+        
+        # prompts 模块的渲染缓存：同一上下文会在逐页生成中被多个线程复用
+        self._cached_original_input: Dict[str, str] = {}
+        self._cached_files_xml = None
     
     def to_dict(self) -> Dict:
         """转换为字典，方便传递"""
@@ -157,12 +167,12 @@ class AIService:
         retry=retry_if_exception_type((json.JSONDecodeError, ValueError)),
         reraise=True
     )
-    def generate_json(self, prompt: str, thinking_budget: int = 1000) -> Union[Dict, List]:
+    def generate_json(self, prompt: Union[str, List[str]], thinking_budget: int = 1000) -> Union[Dict, List]:
         """
         生成并解析JSON，如果解析失败则重新生成
         
         Args:
-            prompt: 生成提示词
+            prompt: 生成提示词（字符串或 prompt 片段列表）
             thinking_budget: 思考预算
             
         Returns:
@@ -274,7 +284,8 @@ class AIService:
         return pages
     
     def generate_page_description(self, project_context: ProjectContext, outline: List[Dict], 
-                                 page_outline: Dict, page_index: int, language='zh') -> str:
+                                 page_outline: Dict, page_index: int, language='zh',
+                                 cache_prefix: bool = False) -> str:
         """
         Generate description for a single page
         Based on demo.py gen_desc() logic
@@ -284,6 +295,8 @@ class AIService:
             outline: Complete outline
             page_outline: Outline for this specific page
             page_index: Page number (1-indexed)
+            cache_prefix: 批量生成时为 True，同一项目的所有页面共享静态指令 + 参考文件前缀，
+                          可复用显式上下文缓存；单页重新生成时不创建缓存
         
         Returns:
             Text description for the page
@@ -299,7 +312,8 @@ class AIService:
             language=language
         )
         
-        response_text = self.text_provider.generate_text(desc_prompt, thinking_budget=1000)
+        response_text = self.text_provider.generate_text(desc_prompt, thinking_budget=1000,
+                                                         cache_prefix=cache_prefix)
         
         return dedent(response_text)
     
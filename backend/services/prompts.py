@@ -3,8 +3,17 @@ AI Service Prompts - 集中管理所有 AI 服务的 prompt 模板
 """
 import json
 import logging
+import re
 from textwrap import dedent
-from typing import List, Dict, Optional, TYPE_CHECKING
+from xml.sax.saxutils import quoteattr
+from typing import List, Dict, Optional, Union, TYPE_CHECKING
+
+from config import Config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 为加速用依赖，缺失时回退到标准库
+    orjson = None
 
 if TYPE_CHECKING:
     from services.ai_service import ProjectContext
@@ -37,6 +46,14 @@ LANGUAGE_CONFIG = {
 }
 
 
+# 按语言代码展开的指令文本，每次查询只需一次字典访问
+_LANGUAGE_INSTRUCTIONS = {code: config['instruction'] for code, config in LANGUAGE_CONFIG.items()}
+_PPT_LANGUAGE_INSTRUCTIONS = {code: config['ppt_text'] for code, config in LANGUAGE_CONFIG.items()}
+
+# 默认输出语言来自环境变量，进程运行期间不会变化，模块加载时读取一次
+_DEFAULT_OUTPUT_LANGUAGE = getattr(Config, 'OUTPUT_LANGUAGE', 'zh')
+
+
 def get_default_output_language() -> str:
     """
     获取环境变量中配置的默认输出语言
@@ -44,8 +61,7 @@ def get_default_output_language() -> str:
     Returns:
         语言代码: 'zh', 'ja', 'en', 'auto'
     """
-    from config import Config
-    return getattr(Config, 'OUTPUT_LANGUAGE', 'zh')
+    return _DEFAULT_OUTPUT_LANGUAGE
 
 
 def get_language_instruction(language: str = None) -> str:
@@ -58,9 +74,7 @@ def get_language_instruction(language: str = None) -> str:
     Returns:
         语言限制指令，如果是自动模式则返回空字符串
     """
-    lang = language if language else get_default_output_language()
-    config = LANGUAGE_CONFIG.get(lang, LANGUAGE_CONFIG['zh'])
-    return config['instruction']
+    return _LANGUAGE_INSTRUCTIONS.get(language or _DEFAULT_OUTPUT_LANGUAGE, _LANGUAGE_INSTRUCTIONS['zh'])
 
 
 def get_ppt_language_instruction(language: str = None) -> str:
@@ -73,9 +87,105 @@ def get_ppt_language_instruction(language: str = None) -> str:
     Returns:
         PPT语言限制指令，如果是自动模式则返回空字符串
     """
-    lang = language if language else get_default_output_language()
-    config = LANGUAGE_CONFIG.get(lang, LANGUAGE_CONFIG['zh'])
-    return config['ppt_text']
+    return _PPT_LANGUAGE_INSTRUCTIONS.get(language or _DEFAULT_OUTPUT_LANGUAGE, _PPT_LANGUAGE_INSTRUCTIONS['zh'])
+
+
+def _log_final_prompt(builder_name: str, prompt: Union[str, List[str]]) -> None:
+    """
+    以 DEBUG 级别记录最终 prompt
+    
+    prompt 可能长达数十 KB（包含参考文件），未开启 DEBUG 时直接跳过，
+    不做任何拼接和格式化。日志级别在应用启动后才配置，因此每次调用时判断。
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    text = prompt if isinstance(prompt, str) else ''.join(prompt)
+    logger.debug("[%s] Final prompt:\n%s", builder_name, text)
+
+
+def _dump_outline_json(outline: List[Dict]) -> str:
+    """
+    将大纲序列化为 prompt 中使用的缩进 JSON
+    
+    优先使用 orjson（C 实现，输出直接为 UTF-8），未安装时回退到标准库 json。
+    字符串、整数和嵌套结构的输出与 ensure_ascii=False、indent=2 一致；浮点数格式可能不同
+    （如 1e20 而非 1e+20，NaN/Infinity 输出为 null）。orjson 无法处理的值
+    （如超出 64 位的整数）回退到标准库。
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(outline, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(outline, ensure_ascii=False, indent=2)
+
+
+# creation_type -> 保存该类型原始输入的 ProjectContext 字段
+_ORIGINAL_INPUT_FIELDS = {
+    'idea': 'idea_prompt',
+    'outline': 'outline_text',
+    'descriptions': 'description_text',
+}
+
+# 原始输入的呈现方式：style -> (按 creation_type 区分的格式, 回退到 idea_prompt 时的格式)
+_ORIGINAL_INPUT_FORMATS = {
+    # 逐页生成描述
+    'page': (
+        {
+            'idea': '{}',
+            'outline': '用户提供的大纲：\n{}',
+            'descriptions': '用户提供的描述：\n{}',
+        },
+        '{}',
+    ),
+    # 修改大纲 / 页面描述
+    'refinement': (
+        {
+            'idea': '- PPT构想：{}\n',
+            'outline': '- 用户提供的大纲文本：\n{}\n',
+            'descriptions': '- 用户提供的页面描述文本：\n{}\n',
+        },
+        '- 用户输入：{}\n',
+    ),
+}
+
+
+def _get_original_input(project_context: 'ProjectContext', style: str) -> str:
+    """
+    按项目类型渲染用户的原始输入
+    
+    优先使用与 creation_type 对应的字段，该字段为空时回退到 idea_prompt。
+    渲染结果缓存在项目上下文上，逐页生成时不再重复判断和拼接。
+    没有缓存字段的上下文对象（如测试替身）每次重新渲染。
+    
+    Args:
+        project_context: 项目上下文对象
+        style: 呈现方式，'page' 或 'refinement'（见 _ORIGINAL_INPUT_FORMATS）
+    """
+    cache = getattr(project_context, '_cached_original_input', None)
+    if cache is not None and style in cache:
+        return cache[style]
+    
+    formats, fallback_format = _ORIGINAL_INPUT_FORMATS[style]
+    creation_type = project_context.creation_type
+    field = _ORIGINAL_INPUT_FIELDS.get(creation_type)
+    value = getattr(project_context, field) if field else None
+    if value:
+        rendered = formats[creation_type].format(value)
+    elif project_context.idea_prompt:
+        rendered = fallback_format.format(project_context.idea_prompt)
+    else:
+        rendered = ""
+    
+    if cache is not None:
+        cache[style] = rendered
+    return rendered
+
+
+_REFERENCE_FILE_XML_TEMPLATE = '  <file name={name}>\n    <content>\n{content}\n    </content>\n  </file>'
+
+# 参考文件内容中会提前闭合外层结构的结束标签（</content>、</file>、</uploaded_files>）
+_REFERENCE_FILE_CLOSING_TAG_RE = re.compile(r'<(?=/\s*(?:content|file|uploaded_files)\s*>)', re.IGNORECASE)
 
 
 def _format_reference_files_xml(reference_files_content: Optional[List[Dict[str, str]]]) -> str:
@@ -91,141 +201,468 @@ def _format_reference_files_xml(reference_files_content: Optional[List[Dict[str,
     if not reference_files_content:
         return ""
     
+    # 每个文件只生成一个片段；文件名转义为属性值。内容多为 markdown，常含 HTML 表格和带 & 的链接，
+    # 整体转义会增加 token 且可能被模型照抄到页面描述中，因此只转义会破坏外层结构的结束标签
     xml_parts = ["<uploaded_files>"]
-    for file_info in reference_files_content:
-        filename = file_info.get('filename', 'unknown')
-        content = file_info.get('content', '')
-        xml_parts.append(f'  <file name="{filename}">')
-        xml_parts.append('    <content>')
-        xml_parts.append(content)
-        xml_parts.append('    </content>')
-        xml_parts.append('  </file>')
-    xml_parts.append('</uploaded_files>')
-    xml_parts.append('')  # Empty line after XML
+    xml_parts.extend(
+        _REFERENCE_FILE_XML_TEMPLATE.format(
+            name=quoteattr(file_info.get('filename', 'unknown')),
+            content=_REFERENCE_FILE_CLOSING_TAG_RE.sub('&lt;', file_info.get('content', '')),
+        )
+        for file_info in reference_files_content
+    )
+    xml_parts.append('</uploaded_files>\n')  # Empty line after XML
     
     return '\n'.join(xml_parts)
 
 
-def get_outline_generation_prompt(project_context: 'ProjectContext', language: str = None) -> str:
+def _get_reference_files_xml(project_context: 'ProjectContext') -> str:
     """
-    生成 PPT 大纲的 prompt
+    获取项目参考文件的 XML 文本
+    
+    参考文件内容可能很大，转义和拼接结果缓存在项目上下文上，
+    同一项目逐页生成时只处理一次。缓存按参考文件列表的身份比较。
+    没有缓存字段的上下文对象（如测试替身）每次重新生成。
+    """
+    reference_files_content = project_context.reference_files_content
+    if not hasattr(project_context, '_cached_files_xml'):
+        return _format_reference_files_xml(reference_files_content)
+    
+    cached = project_context._cached_files_xml
+    if cached is None or cached[0] is not reference_files_content:
+        cached = (reference_files_content, _format_reference_files_xml(reference_files_content))
+        project_context._cached_files_xml = cached
+    return cached[1]
+
+
+def _compose_prompt(static_header: str, files_xml: str, dynamic_tail: str) -> List[str]:
+    """
+    按「静态指令 → 参考文件 → 动态内容」的顺序组装 prompt 片段
+    
+    模型服务端（OpenAI / Gemini 等）按最长公共前缀缓存 prompt，
+    因此不随调用变化的指令必须放在最前面，同一项目的参考文件紧随其后，
+    每次调用都不同的用户输入放在末尾。
+    
+    片段不拼接成一个字符串，由 text provider 作为同一条消息中的多个文本块发送，
+    避免每次调用（例如逐页生成描述）都复制一遍可能很大的参考文件内容。
     
     Args:
-        project_context: 项目上下文对象，包含所有原始信息
-        language: 输出语言代码（'zh', 'ja', 'en', 'auto'），如果为 None 则使用默认语言
+        static_header: 模块级常量形式的静态指令
+        files_xml: 参考文件 XML（可能为空字符串）
+        dynamic_tail: 本次调用的动态内容
         
     Returns:
-        格式化后的 prompt 字符串
+        prompt 片段列表，按顺序连接即为完整 prompt
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
-    idea_prompt = project_context.idea_prompt or ""
-    
-    prompt = (f"""\
-You are a helpful assistant that generates an outline for a ppt.
+    if files_xml:
+        return [static_header, files_xml, dynamic_tail]
+    return [static_header, dynamic_tail]
 
+
+# ===== 各 prompt 的模板（模块加载时构建一次）=====
+# *_HEADER 为静态指令，保证前缀逐字节一致；*_TAIL 为动态内容模板，调用时通过 str.format 填充
+
+# 大纲 JSON 的两种组织格式说明，生成/解析/从描述提取大纲时共用
+_OUTLINE_FORMAT_INSTRUCTIONS = """\
 You can organize the content in two ways:
 
 1. Simple format (for short PPTs without major sections):
-[{{"title": "title1", "points": ["point1", "point2"]}}, {{"title": "title2", "points": ["point1", "point2"]}}]
+[{"title": "title1", "points": ["point1", "point2"]}, {"title": "title2", "points": ["point1", "point2"]}]
 
 2. Part-based format (for longer PPTs with major sections):
 [
-    {{
+    {
     "part": "Part 1: Introduction",
     "pages": [
-        {{"title": "Welcome", "points": ["point1", "point2"]}},
-        {{"title": "Overview", "points": ["point1", "point2"]}}
+        {"title": "Welcome", "points": ["point1", "point2"]},
+        {"title": "Overview", "points": ["point1", "point2"]}
     ]
-    }},
-    {{
+    },
+    {
     "part": "Part 2: Main Content",
     "pages": [
-        {{"title": "Topic 1", "points": ["point1", "point2"]}},
-        {{"title": "Topic 2", "points": ["point1", "point2"]}}
+        {"title": "Topic 1", "points": ["point1", "point2"]},
+        {"title": "Topic 2", "points": ["point1", "point2"]}
     ]
-    }}
+    }
 ]
 
+"""
+
+# 单页描述的格式说明，切分描述和修改描述时共用
+_PAGE_DESCRIPTION_FORMAT = """\
+页面标题：[页面标题]
+
+页面文字：
+- [要点1]
+- [要点2]
+...
+"""
+
+_OUTLINE_GENERATION_HEADER = (
+    """\
+You are a helpful assistant that generates an outline for a ppt.
+
+"""
+    + _OUTLINE_FORMAT_INSTRUCTIONS
+    + """\
 Choose the format that best fits the content. Use parts when the PPT has clear major sections.
 Unless otherwise specified, the first page should be kept simplest, containing only the title, subtitle, and presenter information.
 
+"""
+)
+_OUTLINE_GENERATION_TAIL = """\
 The user's request: {idea_prompt}. Now generate the outline, don't include any other text.
-{get_language_instruction(language)}
-""")
-    
-    final_prompt = files_xml + prompt
-    logger.debug(f"[get_outline_generation_prompt] Final prompt:\n{final_prompt}")
-    return final_prompt
-
+{language_instruction}
+"""
 
-def get_outline_parsing_prompt(project_context: 'ProjectContext', language: str = None ) -> str:
-    """
-    解析用户提供的大纲文本的 prompt
-    
-    Args:
-        project_context: 项目上下文对象，包含所有原始信息
-        
-    Returns:
-        格式化后的 prompt 字符串
-    """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
-    outline_text = project_context.outline_text or ""
-    
-    prompt = (f"""\
+_OUTLINE_PARSING_HEADER = (
+    """\
 You are a helpful assistant that parses a user-provided PPT outline text into a structured format.
 
+The outline text provided by the user is given at the end of this prompt.
+Your task is to analyze this text and convert it into a structured JSON format WITHOUT modifying any of the original text content. 
+You should only reorganize and structure the existing content, preserving all titles, points, and text exactly as provided.
+
+"""
+    + _OUTLINE_FORMAT_INSTRUCTIONS
+    + """\
+Important rules:
+- DO NOT modify, rewrite, or change any text from the original outline
+- DO NOT add new content that wasn't in the original text
+- DO NOT remove any content from the original text
+- Only reorganize the existing content into the structured format
+- Preserve all titles, bullet points, and text exactly as they appear
+- If the text has clear sections/parts, use the part-based format
+- Extract titles and points from the original text, keeping them exactly as written
+
+"""
+)
+_OUTLINE_PARSING_TAIL = """\
 The user has provided the following outline text:
 
 {outline_text}
 
-Your task is to analyze this text and convert it into a structured JSON format WITHOUT modifying any of the original text content. 
-You should only reorganize and structure the existing content, preserving all titles, points, and text exactly as provided.
+Now parse the outline text above into the structured format. Return only the JSON, don't include any other text.
+{language_instruction}
+"""
 
-You can organize the content in two ways:
+_PAGE_DESCRIPTION_HEADER = """\
+我们正在为PPT的每一页生成内容描述。
 
-1. Simple format (for short PPTs without major sections):
-[{{"title": "title1", "points": ["point1", "point2"]}}, {{"title": "title2", "points": ["point1", "point2"]}}]
+【重要提示】生成的"页面文字"部分会直接渲染到PPT页面上，因此请务必注意：
+1. 文字内容要简洁精炼，每条要点控制在15-25字以内
+2. 条理清晰，使用列表形式组织内容
+3. 避免冗长的句子和复杂的表述
+4. 确保内容可读性强，适合在演示时展示
+5. 不要包含任何额外的说明性文字或注释
 
-2. Part-based format (for longer PPTs with major sections):
+输出格式示例：
+页面标题：原始社会：与自然共生
+
+页面文字：
+- 狩猎采集文明：人类活动规模小，对环境影响有限
+- 依赖性强：生活完全依赖自然资源的直接供给
+- 适应而非改造：通过观察学习自然，发展生存技能
+- 影响特点：局部、短期、低强度，生态可自我恢复
+
+其他页面素材（如果文件中存在请积极添加，包括markdown图片链接、公式、表格等）
+
+【关于图片】如果参考文件中包含以 /files/ 开头的本地文件URL图片（例如 /files/mineru/xxx/image.png），请将这些图片以markdown格式输出，例如：![图片描述](/files/mineru/xxx/image.png)。这些图片会被包含在PPT页面中。
+
+"""
+_PAGE_DESCRIPTION_TAIL_TEMPLATE = """\
+用户的原始需求是：
+{original_input}
+
+我们已经有了完整的大纲：
+{outline}
+{part_info}
+现在请为第 {page_index} 页生成描述：
+{page_outline}
+{cover_page_note}
+
+{language_instruction}
+"""
+_COVER_PAGE_DESCRIPTION_NOTE = "**除非特殊要求，第一页的内容需要保持极简，只放标题副标题以及演讲人等（输出到标题后）, 不添加任何素材。**"
+# 封面页的输出示例额外包含副标题；放在 tail 中，使封面页与其他页共享静态指令 + 参考文件前缀
+_COVER_PAGE_SUBTITLE_EXAMPLE = """\
+封面页的页面标题后需要加上副标题，例如：
+页面标题：原始社会：与自然共生
+副标题：人类祖先和自然的相处之道"""
+# 封面页与普通页的 tail 在模块加载时分别生成，调用时按页码选择
+_PAGE_DESCRIPTION_TAIL = _PAGE_DESCRIPTION_TAIL_TEMPLATE.replace("{cover_page_note}", "")
+_COVER_PAGE_DESCRIPTION_TAIL = _PAGE_DESCRIPTION_TAIL_TEMPLATE.replace(
+    "{cover_page_note}", _COVER_PAGE_SUBTITLE_EXAMPLE + "\n" + _COVER_PAGE_DESCRIPTION_NOTE
+)
+
+# 该处参考了@歸藏的A工具箱
+_IMAGE_GENERATION_HEADER_TEMPLATE = """\
+你是一位专家级UI UX演示设计师，专注于生成设计良好的PPT页面。
+
+<design_guidelines>
+- 要求文字清晰锐利, 画面为4K分辨率，16:9比例。
+{template_style_guideline}
+- 根据内容自动设计最完美的构图，不重不漏地渲染"页面描述"中的文本。
+- 如非必要，禁止出现 markdown 格式符号（如 # 和 * 等）。
+{forbidden_template_text_guidline}- 使用大小恰当的装饰性图形或插画对空缺位置进行填补。
+</design_guidelines>
+
+"""
+# 根据是否有模板生成不同的设计指南内容（保持原prompt要点顺序）
+_IMAGE_GENERATION_HEADER = _IMAGE_GENERATION_HEADER_TEMPLATE.format(
+    template_style_guideline="- 配色和设计语言和模板图片严格相似。",
+    forbidden_template_text_guidline="- 只参考风格设计，禁止出现模板中的文字。\n",
+)
+_IMAGE_GENERATION_NO_TEMPLATE_HEADER = _IMAGE_GENERATION_HEADER_TEMPLATE.format(
+    template_style_guideline="- 严格按照风格描述进行设计。",
+    forbidden_template_text_guidline="",
+)
+_IMAGE_GENERATION_TAIL_TEMPLATE = """\
+当前PPT页面的页面描述如下:
+<page_description>
+{page_desc}
+</page_description>
+
+<reference_information>
+整个PPT的大纲为：
+{outline_text}
+
+当前位于章节：{current_section}
+</reference_information>
+{ppt_language_instruction}
+{material_images_note}{extra_req_text}
+
+{cover_page_note}
+"""
+_COVER_PAGE_IMAGE_NOTE = "**注意：当前页面为ppt的封面页，请你采用专业的封面设计美学技巧，务必凸显出页面标题，分清主次，确保一下就能抓住观众的注意力。**"
+_IMAGE_GENERATION_TAIL = _IMAGE_GENERATION_TAIL_TEMPLATE.replace("{cover_page_note}", "")
+_COVER_IMAGE_GENERATION_TAIL = _IMAGE_GENERATION_TAIL_TEMPLATE.replace(
+    "{cover_page_note}", _COVER_PAGE_IMAGE_NOTE
+)
+
+_DESCRIPTION_TO_OUTLINE_HEADER = (
+    """\
+You are a helpful assistant that analyzes a user-provided PPT description text and extracts the outline structure from it.
+
+The description text provided by the user is given at the end of this prompt.
+Your task is to analyze this text and extract the outline structure (titles and key points) for each page.
+You should identify:
+1. How many pages are described
+2. The title for each page
+3. The key points or content structure for each page
+
+"""
+    + _OUTLINE_FORMAT_INSTRUCTIONS
+    + """\
+Important rules:
+- Extract the outline structure from the description text
+- Identify page titles and key points
+- If the text has clear sections/parts, use the part-based format
+- Preserve the logical structure and organization from the original text
+- The points should be concise summaries of the main content for each page
+
+"""
+)
+_DESCRIPTION_TO_OUTLINE_TAIL = """\
+The user has provided the following description text:
+
+{description_text}
+
+Now extract the outline structure from the description text above. Return only the JSON, don't include any other text.
+{language_instruction}
+"""
+
+_DESCRIPTION_SPLIT_HEADER = (
+    """\
+You are a helpful assistant that splits a complete PPT description text into individual page descriptions.
+
+The complete description text and the already extracted outline structure are given at the end of this prompt.
+Your task is to split the description text into individual page descriptions based on the outline structure.
+For each page in the outline, extract the corresponding description from the original text.
+
+Return a JSON array where each element corresponds to a page in the outline (in the same order).
+Each element should be a string containing the page description in the following format:
+
+"""
+    + _PAGE_DESCRIPTION_FORMAT
+    + """\
+
+Example output format:
 [
-    {{
-    "part": "Part 1: Introduction",
+    "页面标题：人工智能的诞生\\n页面文字：\\n- 1950 年，图灵提出"图灵测试"...",
+    "页面标题：AI 的发展历程\\n页面文字：\\n- 1950年代：符号主义...",
+    ...
+]
+
+Important rules:
+- Split the description text according to the outline structure
+- Each page description should match the corresponding page in the outline
+- Preserve all important content from the original text
+- Keep the format consistent with the example above
+- If a page in the outline doesn't have a clear description in the text, create a reasonable description based on the outline
+
+"""
+)
+_DESCRIPTION_SPLIT_TAIL = """\
+The user has provided a complete description text:
+
+{description_text}
+
+We have already extracted the outline structure:
+
+{outline_json}
+
+Now split the description text into individual page descriptions. Return only the JSON array, don't include any other text.
+{language_instruction}
+"""
+
+_OUTLINE_REFINEMENT_HEADER = """\
+You are a helpful assistant that modifies PPT outlines based on user requirements.
+原始输入信息、当前的大纲以及用户的修改要求在本提示词的末尾给出。
+
+请根据用户的要求修改和调整大纲。你可以：
+- 添加、删除或重新排列页面
+- 修改页面标题和要点
+- 调整页面的组织结构
+- 添加或删除章节（part）
+- 合并或拆分页面
+- 根据用户要求进行任何合理的调整
+- 如果当前没有内容，请根据用户要求和原始输入信息创建新的大纲
+
+输出格式可以选择：
+
+1. 简单格式（适用于没有主要章节的短 PPT）：
+[{"title": "title1", "points": ["point1", "point2"]}, {"title": "title2", "points": ["point1", "point2"]}]
+
+2. 基于章节的格式（适用于有明确主要章节的长 PPT）：
+[
+    {
+    "part": "第一部分：引言",
     "pages": [
-        {{"title": "Welcome", "points": ["point1", "point2"]}},
-        {{"title": "Overview", "points": ["point1", "point2"]}}
+        {"title": "欢迎", "points": ["point1", "point2"]},
+        {"title": "概述", "points": ["point1", "point2"]}
     ]
-    }},
-    {{
-    "part": "Part 2: Main Content",
+    },
+    {
+    "part": "第二部分：主要内容",
     "pages": [
-        {{"title": "Topic 1", "points": ["point1", "point2"]}},
-        {{"title": "Topic 2", "points": ["point1", "point2"]}}
+        {"title": "主题1", "points": ["point1", "point2"]},
+        {"title": "主题2", "points": ["point1", "point2"]}
     ]
-    }}
+    }
+]
+
+选择最适合内容的格式。当 PPT 有清晰的主要章节时使用章节格式。
+
+"""
+_OUTLINE_REFINEMENT_TAIL = """\
+{original_input_text}
+当前的 PPT 大纲结构如下：
+
+{outline_text}
+{previous_req_text}
+**用户现在提出新的要求：{user_requirement}**
+
+现在请根据用户要求修改大纲，只输出 JSON 格式的大纲，不要包含其他文字。
+{language_instruction}
+"""
+
+_DESCRIPTIONS_REFINEMENT_HEADER = (
+    """\
+You are a helpful assistant that modifies PPT page descriptions based on user requirements.
+原始输入信息、大纲、当前所有页面的描述以及用户的修改要求在本提示词的末尾给出。
+
+请根据用户的要求修改和调整所有页面的描述。你可以：
+- 修改页面标题和内容
+- 调整页面文字的详细程度
+- 添加或删除要点
+- 调整描述的结构和表达
+- 确保所有页面描述都符合用户的要求
+- 如果当前没有内容，请根据大纲和用户要求创建新的描述
+
+请为每个页面生成修改后的描述，格式如下：
+
+"""
+    + _PAGE_DESCRIPTION_FORMAT
+    + """\
+其他页面素材（如果有请加上，包括markdown图片链接等）
+
+提示：如果参考文件中包含以 /files/ 开头的本地文件URL图片（例如 /files/mineru/xxx/image.png），请将这些图片以markdown格式输出，例如：![图片描述](/files/mineru/xxx/image.png)，而不是作为普通文本。
+
+请返回一个 JSON 数组，每个元素是一个字符串，对应每个页面的修改后描述（按页面顺序）。
+
+示例输出格式：
+[
+    "页面标题：人工智能的诞生\\n页面文字：\\n- 1950 年，图灵提出\\"图灵测试\\"...",
+    "页面标题：AI 的发展历程\\n页面文字：\\n- 1950年代：符号主义...",
+    ...
 ]
 
-Important rules:
-- DO NOT modify, rewrite, or change any text from the original outline
-- DO NOT add new content that wasn't in the original text
-- DO NOT remove any content from the original text
-- Only reorganize the existing content into the structured format
-- Preserve all titles, bullet points, and text exactly as they appear
-- If the text has clear sections/parts, use the part-based format
-- Extract titles and points from the original text, keeping them exactly as written
+"""
+)
+_DESCRIPTIONS_REFINEMENT_TAIL = """\
+{original_input_text}{outline_text}
+{all_descriptions_text}
+{previous_req_text}
+**用户现在提出新的要求：{user_requirement}**
+
+现在请根据用户要求修改所有页面描述，只输出 JSON 数组，不要包含其他文字。
+{language_instruction}
+"""
+
+
+def get_outline_generation_prompt(project_context: 'ProjectContext', language: str = None) -> List[str]:
+    """
+    生成 PPT 大纲的 prompt
+    
+    Args:
+        project_context: 项目上下文对象，包含所有原始信息
+        language: 输出语言代码（'zh', 'ja', 'en', 'auto'），如果为 None 则使用默认语言
+        
+    Returns:
+        prompt 片段列表（见 _compose_prompt）
+    """
+    files_xml = _get_reference_files_xml(project_context)
+    idea_prompt = project_context.idea_prompt or ""
+    
+    tail = _OUTLINE_GENERATION_TAIL.format(
+        idea_prompt=idea_prompt,
+        language_instruction=get_language_instruction(language),
+    )
+    
+    final_prompt = _compose_prompt(_OUTLINE_GENERATION_HEADER, files_xml, tail)
+    _log_final_prompt("get_outline_generation_prompt", final_prompt)
+    return final_prompt
+
 
-Now parse the outline text above into the structured format. Return only the JSON, don't include any other text.
-{get_language_instruction(language)}
-""")
+def get_outline_parsing_prompt(project_context: 'ProjectContext', language: str = None ) -> List[str]:
+    """
+    解析用户提供的大纲文本的 prompt
+    
+    Args:
+        project_context: 项目上下文对象，包含所有原始信息
+        
+    Returns:
+        prompt 片段列表（见 _compose_prompt）
+    """
+    files_xml = _get_reference_files_xml(project_context)
+    outline_text = project_context.outline_text or ""
+    
+    tail = _OUTLINE_PARSING_TAIL.format(
+        outline_text=outline_text,
+        language_instruction=get_language_instruction(language),
+    )
     
-    final_prompt = files_xml + prompt
-    logger.debug(f"[get_outline_parsing_prompt] Final prompt:\n{final_prompt}")
+    final_prompt = _compose_prompt(_OUTLINE_PARSING_HEADER, files_xml, tail)
+    _log_final_prompt("get_outline_parsing_prompt", final_prompt)
     return final_prompt
 
 
 def get_page_description_prompt(project_context: 'ProjectContext', outline: list, 
                                 page_outline: dict, page_index: int, 
                                 part_info: str = "",
-                                language: str = None) -> str:
+                                language: str = None) -> List[str]:
     """
     生成单个页面描述的 prompt
     
@@ -237,53 +674,24 @@ def get_page_description_prompt(project_context: 'ProjectContext', outline: list
         part_info: 可选的章节信息
         
     Returns:
-        格式化后的 prompt 字符串
+        prompt 片段列表（见 _compose_prompt）
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = _get_reference_files_xml(project_context)
     # 根据项目类型选择最相关的原始输入
-    if project_context.creation_type == 'idea' and project_context.idea_prompt:
-        original_input = project_context.idea_prompt
-    elif project_context.creation_type == 'outline' and project_context.outline_text:
-        original_input = f"用户提供的大纲：\n{project_context.outline_text}"
-    elif project_context.creation_type == 'descriptions' and project_context.description_text:
-        original_input = f"用户提供的描述：\n{project_context.description_text}"
-    else:
-        original_input = project_context.idea_prompt or ""
+    original_input = _get_original_input(project_context, 'page')
     
-    prompt = (f"""\
-我们正在为PPT的每一页生成内容描述。
-用户的原始需求是：\n{original_input}\n
-我们已经有了完整的大纲：\n{outline}\n{part_info}
-现在请为第 {page_index} 页生成描述：
-{page_outline}
-{"**除非特殊要求，第一页的内容需要保持极简，只放标题副标题以及演讲人等（输出到标题后）, 不添加任何素材。**" if page_index == 1 else ""}
-
-【重要提示】生成的"页面文字"部分会直接渲染到PPT页面上，因此请务必注意：
-1. 文字内容要简洁精炼，每条要点控制在15-25字以内
-2. 条理清晰，使用列表形式组织内容
-3. 避免冗长的句子和复杂的表述
-4. 确保内容可读性强，适合在演示时展示
-5. 不要包含任何额外的说明性文字或注释
-
-输出格式示例：
-页面标题：原始社会：与自然共生
-{"副标题：人类祖先和自然的相处之道" if page_index == 1 else ""}
-
-页面文字：
-- 狩猎采集文明：人类活动规模小，对环境影响有限
-- 依赖性强：生活完全依赖自然资源的直接供给
-- 适应而非改造：通过观察学习自然，发展生存技能
-- 影响特点：局部、短期、低强度，生态可自我恢复
-
-其他页面素材（如果文件中存在请积极添加，包括markdown图片链接、公式、表格等）
-
-【关于图片】如果参考文件中包含以 /files/ 开头的本地文件URL图片（例如 /files/mineru/xxx/image.png），请将这些图片以markdown格式输出，例如：![图片描述](/files/mineru/xxx/image.png)。这些图片会被包含在PPT页面中。
-
-{get_language_instruction(language)}
-""")
+    tail_template = _COVER_PAGE_DESCRIPTION_TAIL if page_index == 1 else _PAGE_DESCRIPTION_TAIL
+    tail = tail_template.format(
+        original_input=original_input,
+        outline=outline,
+        part_info=part_info,
+        page_index=page_index,
+        page_outline=page_outline,
+        language_instruction=get_language_instruction(language),
+    )
     
-    final_prompt = files_xml + prompt
-    logger.debug(f"[get_page_description_prompt] Final prompt:\n{final_prompt}")
+    final_prompt = _compose_prompt(_PAGE_DESCRIPTION_HEADER, files_xml, tail)
+    _log_final_prompt("get_page_description_prompt", final_prompt)
     return final_prompt
 
 
@@ -323,43 +731,26 @@ def get_image_generation_prompt(page_desc: str, outline_text: str,
     if extra_requirements and extra_requirements.strip():
         extra_req_text = f"\n\n额外要求（请务必遵循）：\n{extra_requirements}\n"
 
-    # 根据是否有模板生成不同的设计指南内容（保持原prompt要点顺序）
-    template_style_guideline = "- 配色和设计语言和模板图片严格相似。" if has_template else "- 严格按照风格描述进行设计。"
-    forbidden_template_text_guidline = "- 只参考风格设计，禁止出现模板中的文字。\n" if has_template else ""
-
-    # 该处参考了@歸藏的A工具箱
-    prompt = (f"""\
-你是一位专家级UI UX演示设计师，专注于生成设计良好的PPT页面。
-当前PPT页面的页面描述如下:
-<page_description>
-{page_desc}
-</page_description>
-
-<reference_information>
-整个PPT的大纲为：
-{outline_text}
-
-当前位于章节：{current_section}
-</reference_information>
-
-
-<design_guidelines>
-- 要求文字清晰锐利, 画面为4K分辨率，16:9比例。
-{template_style_guideline}
-- 根据内容自动设计最完美的构图，不重不漏地渲染"页面描述"中的文本。
-- 如非必要，禁止出现 markdown 格式符号（如 # 和 * 等）。
-{forbidden_template_text_guidline}- 使用大小恰当的装饰性图形或插画对空缺位置进行填补。
-</design_guidelines>
-{get_ppt_language_instruction(language)}
-{material_images_note}{extra_req_text}
-
-{"**注意：当前页面为ppt的封面页，请你采用专业的封面设计美学技巧，务必凸显出页面标题，分清主次，确保一下就能抓住观众的注意力。**" if page_index == 1 else ""}
-""")
+    header = _IMAGE_GENERATION_HEADER if has_template else _IMAGE_GENERATION_NO_TEMPLATE_HEADER
+    tail_template = _COVER_IMAGE_GENERATION_TAIL if page_index == 1 else _IMAGE_GENERATION_TAIL
+    tail = tail_template.format(
+        page_desc=page_desc,
+        outline_text=outline_text,
+        current_section=current_section,
+        ppt_language_instruction=get_ppt_language_instruction(language),
+        material_images_note=material_images_note,
+        extra_req_text=extra_req_text,
+    )
     
-    logger.debug(f"[get_image_generation_prompt] Final prompt:\n{prompt}")
+    prompt = header + tail
+    _log_final_prompt("get_image_generation_prompt", prompt)
     return prompt
 
 
+# 页面描述中"其他页面素材"段落的标题；英文输出时模型可能将其译为英文
+_PAGE_MATERIALS_MARKERS = ("其他页面素材", "Other page materials")
+
+
 def get_image_edit_prompt(edit_instruction: str, original_description: str = None) -> str:
     """
     生成图片编辑 prompt
@@ -373,8 +764,11 @@ def get_image_edit_prompt(edit_instruction: str, original_description: str = Non
     """
     if original_description:
         # 删除"其他页面素材："之后的内容，避免被前面的图影响
-        if "其他页面素材" in original_description:
-            original_description = original_description.split("其他页面素材")[0].strip()
+        for marker in _PAGE_MATERIALS_MARKERS:
+            head, sep, _ = original_description.partition(marker)
+            if sep:
+                original_description = head.strip()
+                break
         
         prompt = (f"""\
 该PPT页面的原始页面描述为：
@@ -387,11 +781,11 @@ def get_image_edit_prompt(edit_instruction: str, original_description: str = Non
     else:
         prompt = f"根据以下指令修改这张PPT页面：{edit_instruction}\n保持原有的内容结构和设计风格，只按照指令进行修改。提供的参考图中既有新素材，也有用户手动框选出的区域，请你根据原图和参考图的关系智能判断用户意图。"
     
-    logger.debug(f"[get_image_edit_prompt] Final prompt:\n{prompt}")
+    _log_final_prompt("get_image_edit_prompt", prompt)
     return prompt
 
 
-def get_description_to_outline_prompt(project_context: 'ProjectContext', language: str = None) -> str:
+def get_description_to_outline_prompt(project_context: 'ProjectContext', language: str = None) -> List[str]:
     """
     从描述文本解析出大纲的 prompt
     
@@ -399,66 +793,24 @@ def get_description_to_outline_prompt(project_context: 'ProjectContext', languag
         project_context: 项目上下文对象，包含所有原始信息
         
     Returns:
-        格式化后的 prompt 字符串
+        prompt 片段列表（见 _compose_prompt）
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = _get_reference_files_xml(project_context)
     description_text = project_context.description_text or ""
     
-    prompt = (f"""\
-You are a helpful assistant that analyzes a user-provided PPT description text and extracts the outline structure from it.
-
-The user has provided the following description text:
-
-{description_text}
-
-Your task is to analyze this text and extract the outline structure (titles and key points) for each page.
-You should identify:
-1. How many pages are described
-2. The title for each page
-3. The key points or content structure for each page
-
-You can organize the content in two ways:
-
-1. Simple format (for short PPTs without major sections):
-[{{"title": "title1", "points": ["point1", "point2"]}}, {{"title": "title2", "points": ["point1", "point2"]}}]
-
-2. Part-based format (for longer PPTs with major sections):
-[
-    {{
-    "part": "Part 1: Introduction",
-    "pages": [
-        {{"title": "Welcome", "points": ["point1", "point2"]}},
-        {{"title": "Overview", "points": ["point1", "point2"]}}
-    ]
-    }},
-    {{
-    "part": "Part 2: Main Content",
-    "pages": [
-        {{"title": "Topic 1", "points": ["point1", "point2"]}},
-        {{"title": "Topic 2", "points": ["point1", "point2"]}}
-    ]
-    }}
-]
-
-Important rules:
-- Extract the outline structure from the description text
-- Identify page titles and key points
-- If the text has clear sections/parts, use the part-based format
-- Preserve the logical structure and organization from the original text
-- The points should be concise summaries of the main content for each page
-
-Now extract the outline structure from the description text above. Return only the JSON, don't include any other text.
-{get_language_instruction(language)}
-""")
+    tail = _DESCRIPTION_TO_OUTLINE_TAIL.format(
+        description_text=description_text,
+        language_instruction=get_language_instruction(language),
+    )
     
-    final_prompt = files_xml + prompt
-    logger.debug(f"[get_description_to_outline_prompt] Final prompt:\n{final_prompt}")
+    final_prompt = _compose_prompt(_DESCRIPTION_TO_OUTLINE_HEADER, files_xml, tail)
+    _log_final_prompt("get_description_to_outline_prompt", final_prompt)
     return final_prompt
 
 
 def get_description_split_prompt(project_context: 'ProjectContext', 
                                  outline: List[Dict], 
-                                 language: str = None) -> str:
+                                 language: str = None) -> List[str]:
     """
     从描述文本切分出每页描述的 prompt
     
@@ -467,61 +819,26 @@ def get_description_split_prompt(project_context: 'ProjectContext',
         outline: 已解析出的大纲结构
         
     Returns:
-        格式化后的 prompt 字符串
+        prompt 片段列表（见 _compose_prompt）
     """
-    outline_json = json.dumps(outline, ensure_ascii=False, indent=2)
+    outline_json = _dump_outline_json(outline)
     description_text = project_context.description_text or ""
     
-    prompt = (f"""\
-You are a helpful assistant that splits a complete PPT description text into individual page descriptions.
-
-The user has provided a complete description text:
-
-{description_text}
-
-We have already extracted the outline structure:
-
-{outline_json}
-
-Your task is to split the description text into individual page descriptions based on the outline structure.
-For each page in the outline, extract the corresponding description from the original text.
-
-Return a JSON array where each element corresponds to a page in the outline (in the same order).
-Each element should be a string containing the page description in the following format:
-
-页面标题：[页面标题]
-
-页面文字：
-- [要点1]
-- [要点2]
-...
-
-Example output format:
-[
-    "页面标题：人工智能的诞生\\n页面文字：\\n- 1950 年，图灵提出"图灵测试"...",
-    "页面标题：AI 的发展历程\\n页面文字：\\n- 1950年代：符号主义...",
-    ...
-]
-
-Important rules:
-- Split the description text according to the outline structure
-- Each page description should match the corresponding page in the outline
-- Preserve all important content from the original text
-- Keep the format consistent with the example above
-- If a page in the outline doesn't have a clear description in the text, create a reasonable description based on the outline
-
-Now split the description text into individual page descriptions. Return only the JSON array, don't include any other text.
-{get_language_instruction(language)}
-""")
+    tail = _DESCRIPTION_SPLIT_TAIL.format(
+        description_text=description_text,
+        outline_json=outline_json,
+        language_instruction=get_language_instruction(language),
+    )
     
-    logger.debug(f"[get_description_split_prompt] Final prompt:\n{prompt}")
-    return prompt
+    final_prompt = _compose_prompt(_DESCRIPTION_SPLIT_HEADER, "", tail)
+    _log_final_prompt("get_description_split_prompt", final_prompt)
+    return final_prompt
 
 
 def get_outline_refinement_prompt(current_outline: List[Dict], user_requirement: str,
                                    project_context: 'ProjectContext',
                                    previous_requirements: Optional[List[str]] = None,
-                                   language: str = None) -> str:
+                                   language: str = None) -> List[str]:
     """
     根据用户要求修改已有大纲的 prompt
     
@@ -532,15 +849,15 @@ def get_outline_refinement_prompt(current_outline: List[Dict], user_requirement:
         previous_requirements: 之前的修改要求列表（可选）
         
     Returns:
-        格式化后的 prompt 字符串
+        prompt 片段列表（见 _compose_prompt）
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = _get_reference_files_xml(project_context)
     
     # 处理空大纲的情况
     if not current_outline or len(current_outline) == 0:
         outline_text = "(当前没有内容)"
     else:
-        outline_text = json.dumps(current_outline, ensure_ascii=False, indent=2)
+        outline_text = _dump_outline_json(current_outline)
     
     # 构建之前的修改历史记录
     previous_req_text = ""
@@ -549,65 +866,18 @@ def get_outline_refinement_prompt(current_outline: List[Dict], user_requirement:
         previous_req_text = f"\n\n之前用户提出的修改要求：\n{prev_list}\n"
     
     # 构建原始输入信息（根据项目类型显示不同的原始内容）
-    original_input_text = "\n原始输入信息：\n"
-    if project_context.creation_type == 'idea' and project_context.idea_prompt:
-        original_input_text += f"- PPT构想：{project_context.idea_prompt}\n"
-    elif project_context.creation_type == 'outline' and project_context.outline_text:
-        original_input_text += f"- 用户提供的大纲文本：\n{project_context.outline_text}\n"
-    elif project_context.creation_type == 'descriptions' and project_context.description_text:
-        original_input_text += f"- 用户提供的页面描述文本：\n{project_context.description_text}\n"
-    elif project_context.idea_prompt:
-        original_input_text += f"- 用户输入：{project_context.idea_prompt}\n"
+    original_input_text = "\n原始输入信息：\n" + _get_original_input(project_context, 'refinement')
     
-    prompt = (f"""\
-You are a helpful assistant that modifies PPT outlines based on user requirements.
-{original_input_text}
-当前的 PPT 大纲结构如下：
-
-{outline_text}
-{previous_req_text}
-**用户现在提出新的要求：{user_requirement}**
-
-请根据用户的要求修改和调整大纲。你可以：
-- 添加、删除或重新排列页面
-- 修改页面标题和要点
-- 调整页面的组织结构
-- 添加或删除章节（part）
-- 合并或拆分页面
-- 根据用户要求进行任何合理的调整
-- 如果当前没有内容，请根据用户要求和原始输入信息创建新的大纲
-
-输出格式可以选择：
-
-1. 简单格式（适用于没有主要章节的短 PPT）：
-[{{"title": "title1", "points": ["point1", "point2"]}}, {{"title": "title2", "points": ["point1", "point2"]}}]
-
-2. 基于章节的格式（适用于有明确主要章节的长 PPT）：
-[
-    {{
-    "part": "第一部分：引言",
-    "pages": [
-        {{"title": "欢迎", "points": ["point1", "point2"]}},
-        {{"title": "概述", "points": ["point1", "point2"]}}
-    ]
-    }},
-    {{
-    "part": "第二部分：主要内容",
-    "pages": [
-        {{"title": "主题1", "points": ["point1", "point2"]}},
-        {{"title": "主题2", "points": ["point1", "point2"]}}
-    ]
-    }}
-]
-
-选择最适合内容的格式。当 PPT 有清晰的主要章节时使用章节格式。
-
-现在请根据用户要求修改大纲，只输出 JSON 格式的大纲，不要包含其他文字。
-{get_language_instruction(language)}
-""")
+    tail = _OUTLINE_REFINEMENT_TAIL.format(
+        original_input_text=original_input_text,
+        outline_text=outline_text,
+        previous_req_text=previous_req_text,
+        user_requirement=user_requirement,
+        language_instruction=get_language_instruction(language),
+    )
     
-    final_prompt = files_xml + prompt
-    logger.debug(f"[get_outline_refinement_prompt] Final prompt:\n{final_prompt}")
+    final_prompt = _compose_prompt(_OUTLINE_REFINEMENT_HEADER, files_xml, tail)
+    _log_final_prompt("get_outline_refinement_prompt", final_prompt)
     return final_prompt
 
 
@@ -615,7 +885,7 @@ def get_descriptions_refinement_prompt(current_descriptions: List[Dict], user_re
                                        project_context: 'ProjectContext',
                                        outline: List[Dict] = None,
                                        previous_requirements: Optional[List[str]] = None,
-                                       language: str = None) -> str:
+                                       language: str = None) -> List[str]:
     """
     根据用户要求修改已有页面描述的 prompt
     
@@ -627,9 +897,9 @@ def get_descriptions_refinement_prompt(current_descriptions: List[Dict], user_re
         previous_requirements: 之前的修改要求列表（可选）
         
     Returns:
-        格式化后的 prompt 字符串
+        prompt 片段列表（见 _compose_prompt）
     """
-    files_xml = _format_reference_files_xml(project_context.reference_files_content)
+    files_xml = _get_reference_files_xml(project_context)
     
     # 构建之前的修改历史记录
     previous_req_text = ""
@@ -638,24 +908,16 @@ def get_descriptions_refinement_prompt(current_descriptions: List[Dict], user_re
         previous_req_text = f"\n\n之前用户提出的修改要求：\n{prev_list}\n"
     
     # 构建原始输入信息
-    original_input_text = "\n原始输入信息：\n"
-    if project_context.creation_type == 'idea' and project_context.idea_prompt:
-        original_input_text += f"- PPT构想：{project_context.idea_prompt}\n"
-    elif project_context.creation_type == 'outline' and project_context.outline_text:
-        original_input_text += f"- 用户提供的大纲文本：\n{project_context.outline_text}\n"
-    elif project_context.creation_type == 'descriptions' and project_context.description_text:
-        original_input_text += f"- 用户提供的页面描述文本：\n{project_context.description_text}\n"
-    elif project_context.idea_prompt:
-        original_input_text += f"- 用户输入：{project_context.idea_prompt}\n"
+    original_input_text = "\n原始输入信息：\n" + _get_original_input(project_context, 'refinement')
     
     # 构建大纲文本
     outline_text = ""
     if outline:
-        outline_json = json.dumps(outline, ensure_ascii=False, indent=2)
+        outline_json = _dump_outline_json(outline)
         outline_text = f"\n\n完整的 PPT 大纲：\n{outline_json}\n"
     
-    # 构建所有页面描述的汇总
-    all_descriptions_text = "当前所有页面的描述：\n\n"
+    # 构建所有页面描述的汇总（先收集片段，最后一次性拼接）
+    description_parts = ["当前所有页面的描述：\n\n"]
     has_any_description = False
     for desc in current_descriptions:
         page_num = desc.get('index', 0) + 1
@@ -666,64 +928,30 @@ def get_descriptions_refinement_prompt(current_descriptions: List[Dict], user_re
         
         if content:
             has_any_description = True
-            all_descriptions_text += f"--- 第 {page_num} 页：{title} ---\n{content}\n\n"
         else:
-            all_descriptions_text += f"--- 第 {page_num} 页：{title} ---\n(当前没有内容)\n\n"
+            content = "(当前没有内容)"
+        description_parts.append(f"--- 第 {page_num} 页：{title} ---\n{content}\n\n")
     
-    if not has_any_description:
+    if has_any_description:
+        all_descriptions_text = "".join(description_parts)
+    else:
         all_descriptions_text = "当前所有页面的描述：\n\n(当前没有内容，需要基于大纲生成新的描述)\n\n"
     
-    prompt = (f"""\
-You are a helpful assistant that modifies PPT page descriptions based on user requirements.
-{original_input_text}{outline_text}
-{all_descriptions_text}
-{previous_req_text}
-**用户现在提出新的要求：{user_requirement}**
-
-请根据用户的要求修改和调整所有页面的描述。你可以：
-- 修改页面标题和内容
-- 调整页面文字的详细程度
-- 添加或删除要点
-- 调整描述的结构和表达
-- 确保所有页面描述都符合用户的要求
-- 如果当前没有内容，请根据大纲和用户要求创建新的描述
-
-请为每个页面生成修改后的描述，格式如下：
-
-页面标题：[页面标题]
-
-页面文字：
-- [要点1]
-- [要点2]
-...
-其他页面素材（如果有请加上，包括markdown图片链接等）
-
-提示：如果参考文件中包含以 /files/ 开头的本地文件URL图片（例如 /files/mineru/xxx/image.png），请将这些图片以markdown格式输出，例如：![图片描述](/files/mineru/xxx/image.png)，而不是作为普通文本。
-
-请返回一个 JSON 数组，每个元素是一个字符串，对应每个页面的修改后描述（按页面顺序）。
-
-示例输出格式：
-[
-    "页面标题：人工智能的诞生\\n页面文字：\\n- 1950 年，图灵提出\\"图灵测试\\"...",
-    "页面标题：AI 的发展历程\\n页面文字：\\n- 1950年代：符号主义...",
-    ...
-]
-
-现在请根据用户要求修改所有页面描述，只输出 JSON 数组，不要包含其他文字。
-{get_language_instruction(language)}
-""")
+    tail = _DESCRIPTIONS_REFINEMENT_TAIL.format(
+        original_input_text=original_input_text,
+        outline_text=outline_text,
+        all_descriptions_text=all_descriptions_text,
+        previous_req_text=previous_req_text,
+        user_requirement=user_requirement,
+        language_instruction=get_language_instruction(language),
+    )
     
-    final_prompt = files_xml + prompt
-    logger.debug(f"[get_descriptions_refinement_prompt] Final prompt:\n{final_prompt}")
+    final_prompt = _compose_prompt(_DESCRIPTIONS_REFINEMENT_HEADER, files_xml, tail)
+    _log_final_prompt("get_descriptions_refinement_prompt", final_prompt)
     return final_prompt
 
 
-def get_clean_background_prompt() -> str:
-    """
-    生成纯背景图的 prompt（去除文字和插画）
-    用于从完整的PPT页面中提取纯背景
-    """
-    prompt = """\
+_CLEAN_BACKGROUND_PROMPT = """\
 你是一位专业的图片文字&图片擦除专家。你的任务是从原始图片中移除文字和配图，输出一张无任何文字和图表内容、干净纯净的底板图。
 <requirements>
 - 彻底移除页面中的所有文字、插画、图表。必须确保所有文字都被完全去除。
@@ -735,8 +963,15 @@ def get_clean_background_prompt() -> str:
 
 注意，**任意位置的, 所有的**文字和图表都应该被彻底移除，**输出不应该包含任何文字和图表。**
 """
-    logger.debug(f"[get_clean_background_prompt] Final prompt:\n{prompt}")
-    return prompt
+
+
+def get_clean_background_prompt() -> str:
+    """
+    生成纯背景图的 prompt（去除文字和插画）
+    用于从完整的PPT页面中提取纯背景
+    """
+    _log_final_prompt("get_clean_background_prompt", _CLEAN_BACKGROUND_PROMPT)
+    return _CLEAN_BACKGROUND_PROMPT
 
 
 def get_text_attribute_extraction_prompt(content_hint: str = "") -> str:
@@ -765,7 +1000,7 @@ def get_text_attribute_extraction_prompt(content_hint: str = "") -> str:
 ```
 """.format(content_hint=content_hint)
     
-    logger.debug(f"[get_text_attribute_extraction_prompt] Final prompt:\n{prompt}")
+    _log_final_prompt("get_text_attribute_extraction_prompt", prompt)
     return prompt
 
 
@@ -839,7 +1074,7 @@ def get_batch_text_attribute_extraction_prompt(text_elements_json: str) -> str:
 ```
 """
     
-    logger.debug(f"[get_batch_text_attribute_extraction_prompt] Final prompt:\n{prompt}")
+    _log_final_prompt("get_batch_text_attribute_extraction_prompt", prompt)
     return prompt
 
 
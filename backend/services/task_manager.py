@@ -197,7 +197,8 @@ def generate_descriptions_task(task_id: str, project_id: str, ai_service,
                         
                         desc_text = ai_service.generate_page_description(
                             project_context, outline, page_outline, page_index,
-                            language=language
+                            language=language,
+                            cache_prefix=True
                         )
                         
                         # Parse description into structured format
@@ -0,0 +1,173 @@
+"""
+GenAI 显式上下文缓存单元测试
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+from unittest.mock import MagicMock
+from google.genai import errors
+
+from services.ai_providers.text.genai_provider import GenAITextProvider
+
+
+LARGE_FILES_XML = '<uploaded_files>\n' + 'x' * 40000 + '</uploaded_files>\n'
+
+# 跳过 tenacity 重试，直接观察单次调用失败后的缓存状态
+generate_once = GenAITextProvider.generate_text.__wrapped__
+
+
+def _client_error(code, message):
+    return errors.ClientError(code, {'error': {'code': code, 'message': message, 'status': 'ERROR'}})
+
+
+def _make_provider(cache_name='cachedContents/abc'):
+    """创建使用 mock client 的 GenAI 文本 provider（跳过真实 client 初始化）"""
+    instance = GenAITextProvider.__new__(GenAITextProvider)
+    instance._context_caches = {}
+    instance._context_caches_lock = threading.Lock()
+    instance.client = MagicMock()
+    instance.client.caches.create.return_value.name = cache_name
+    instance.client.models.generate_content.return_value.text = 'ok'
+    instance.model = 'gemini-test'
+    return instance
+
+
+@pytest.fixture
+def provider():
+    """使用 mock client 的 GenAI 文本 provider"""
+    return _make_provider()
+
+
+class TestGenAIContextCache:
+    """显式上下文缓存测试"""
+
+    def test_large_prefix_is_cached_once(self, provider):
+        """参考文件前缀较大时只创建一次缓存，之后只发送动态内容"""
+        provider.generate_text(['header', LARGE_FILES_XML, 'page 1'], cache_prefix=True)
+        provider.generate_text(['header', LARGE_FILES_XML, 'page 2'], cache_prefix=True)
+
+        provider.client.caches.create.assert_called_once()
+        call = provider.client.models.generate_content.call_args
+        assert call.kwargs['contents'] == 'page 2'
+        assert call.kwargs['config'].cached_content == 'cachedContents/abc'
+
+    def test_cache_requires_explicit_flag(self, provider):
+        """未声明前缀会被复用时不创建缓存，发送完整 prompt"""
+        prompt = ['header', LARGE_FILES_XML, 'tail']
+
+        provider.generate_text(prompt)
+
+        provider.client.caches.create.assert_not_called()
+        call = provider.client.models.generate_content.call_args
+        assert call.kwargs['contents'] == prompt
+        assert call.kwargs['config'].cached_content is None
+
+    def test_short_prefix_sends_full_prompt(self, provider):
+        """前缀较短时不创建缓存，发送完整 prompt"""
+        provider.generate_text(['header', 'tail'], cache_prefix=True)
+
+        provider.client.caches.create.assert_not_called()
+        call = provider.client.models.generate_content.call_args
+        assert call.kwargs['contents'] == ['header', 'tail']
+
+    def test_create_failure_falls_back_to_full_prompt(self, provider):
+        """创建缓存失败时发送完整 prompt，且不再重复尝试创建"""
+        provider.client.caches.create.side_effect = RuntimeError('caches not supported')
+        prompt = ['header', LARGE_FILES_XML, 'page 1']
+
+        assert provider.generate_text(prompt, cache_prefix=True) == 'ok'
+        provider.generate_text(prompt, cache_prefix=True)
+
+        provider.client.caches.create.assert_called_once()
+        call = provider.client.models.generate_content.call_args
+        assert call.kwargs['contents'] == prompt
+
+    def test_expired_entries_are_evicted(self, provider):
+        """查找缓存时清理其他前缀已过期的条目"""
+        stale = Future()
+        stale.set_result('cachedContents/stale')
+        provider._context_caches['stale-key'] = (stale, time.monotonic() - 1)
+
+        provider.generate_text(['header', LARGE_FILES_XML, 'page 1'], cache_prefix=True)
+
+        assert 'stale-key' not in provider._context_caches
+        assert len(provider._context_caches) == 1
+
+    def test_caches_are_not_shared_between_providers(self, provider):
+        """cached content 归属于各自的 client，更换 API key 后重建的 provider 重新创建缓存"""
+        prompt = ['header', LARGE_FILES_XML, 'page 1']
+        other = _make_provider('cachedContents/other')
+
+        provider.generate_text(prompt, cache_prefix=True)
+        other.generate_text(prompt, cache_prefix=True)
+
+        other.client.caches.create.assert_called_once()
+        call = other.client.models.generate_content.call_args
+        assert call.kwargs['config'].cached_content == 'cachedContents/other'
+
+    def test_creating_one_cache_does_not_block_other_prefixes(self, provider):
+        """创建某个前缀的缓存时，其他前缀的调用不需要等待"""
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def create(model, config):
+            # 第一次创建（前缀 A）阻塞，直到测试放行
+            calls.append(model)
+            if len(calls) == 1:
+                started.set()
+                release.wait(timeout=5)
+            cached = MagicMock()
+            cached.name = f'cachedContents/{len(calls)}'
+            return cached
+
+        provider.client.caches.create.side_effect = create
+        slow = threading.Thread(
+            target=provider.generate_text, args=(['A', LARGE_FILES_XML, 'page'],), kwargs={'cache_prefix': True}
+        )
+        slow.start()
+        assert started.wait(timeout=5)
+        try:
+            other = threading.Thread(
+                target=provider.generate_text, args=(['B', LARGE_FILES_XML, 'page'],), kwargs={'cache_prefix': True}
+            )
+            other.start()
+            other.join(timeout=2)
+
+            assert not other.is_alive()
+            assert slow.is_alive()
+        finally:
+            release.set()
+            slow.join(timeout=5)
+
+    def test_transient_error_keeps_cache(self, provider):
+        """限流等与缓存无关的错误不会丢弃缓存"""
+        prompt = ['header', LARGE_FILES_XML, 'page 1']
+        provider.client.models.generate_content.side_effect = [_client_error(429, 'Resource exhausted'), MagicMock()]
+
+        with pytest.raises(errors.ClientError):
+            generate_once(provider, prompt, cache_prefix=True)
+        generate_once(provider, prompt, cache_prefix=True)
+
+        provider.client.caches.create.assert_called_once()
+        provider.client.caches.delete.assert_not_called()
+
+    def test_missing_cache_falls_back_to_full_prompt(self, provider):
+        """缓存在服务端不可用时删除它，重试发送完整 prompt 且不再重新创建"""
+        prompt = ['header', LARGE_FILES_XML, 'page 1']
+        provider.client.models.generate_content.side_effect = [
+            _client_error(403, 'CachedContent not found (or permission denied)'),
+            MagicMock(),
+        ]
+
+        with pytest.raises(errors.ClientError):
+            generate_once(provider, prompt, cache_prefix=True)
+        generate_once(provider, prompt, cache_prefix=True)
+
+        provider.client.caches.delete.assert_called_once_with(name='cachedContents/abc')
+        provider.client.caches.create.assert_called_once()
+        call = provider.client.models.generate_content.call_args
+        assert call.kwargs['contents'] == prompt
+        assert call.kwargs['config'].cached_content is None
@@ -0,0 +1,224 @@
+"""
+Prompt 模板单元测试
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from services.ai_service import ProjectContext
+from services import prompts
+
+
+@pytest.fixture
+def project_context():
+    """带参考文件的项目上下文"""
+    return ProjectContext(
+        {
+            'idea_prompt': '介绍人工智能的发展历史',
+            'outline_text': '1. 起源\n2. 发展',
+            'description_text': '第一页：AI 的诞生',
+            'creation_type': 'idea',
+        },
+        reference_files_content=[{'filename': 'notes.md', 'content': '参考资料内容'}],
+    )
+
+
+SAMPLE_OUTLINE = [
+    {'title': '封面', 'points': ['AI 简史']},
+    {'title': '起源', 'points': ['图灵测试']},
+]
+
+
+class TestPromptPrefixLayout:
+    """静态指令前置（便于模型服务端前缀缓存）测试"""
+
+    def test_outline_prompt_segments(self, project_context):
+        """大纲 prompt 依次为静态指令、参考文件、用户输入三个片段"""
+        parts = prompts.get_outline_generation_prompt(project_context, 'zh')
+
+        assert len(parts) == 3
+        assert parts[0] is prompts._OUTLINE_GENERATION_HEADER
+        assert parts[1].startswith('<uploaded_files>')
+        assert project_context.idea_prompt in parts[2]
+
+    def test_prompt_without_reference_files_has_no_files_segment(self):
+        """没有参考文件时不包含参考文件片段"""
+        context = ProjectContext({'idea_prompt': '测试', 'creation_type': 'idea'})
+
+        parts = prompts.get_outline_generation_prompt(context, 'zh')
+
+        assert len(parts) == 2
+        assert '<uploaded_files>' not in ''.join(parts)
+
+    def test_page_description_prompts_share_prefix(self, project_context):
+        """同一项目的非封面页 prompt 拥有相同的静态指令 + 参考文件前缀"""
+        page2 = prompts.get_page_description_prompt(
+            project_context, SAMPLE_OUTLINE, SAMPLE_OUTLINE[1], 2, language='zh'
+        )
+        page3 = prompts.get_page_description_prompt(
+            project_context, SAMPLE_OUTLINE, SAMPLE_OUTLINE[1], 3, language='zh'
+        )
+
+        assert page2[0] is prompts._PAGE_DESCRIPTION_HEADER
+        assert page2[:2] == page3[:2]
+        assert page2[2] != page3[2]
+
+    def test_cover_page_description_shares_prefix(self, project_context):
+        """封面页与其他页共享前缀，副标题示例放在动态内容中"""
+        cover = prompts.get_page_description_prompt(
+            project_context, SAMPLE_OUTLINE, SAMPLE_OUTLINE[0], 1, language='zh'
+        )
+        page2 = prompts.get_page_description_prompt(
+            project_context, SAMPLE_OUTLINE, SAMPLE_OUTLINE[1], 2, language='zh'
+        )
+
+        assert cover[:2] == page2[:2]
+        assert '副标题：' in cover[-1]
+        assert '副标题：' not in page2[-1]
+        assert prompts._COVER_PAGE_DESCRIPTION_NOTE in cover[-1]
+
+    def test_cover_note_only_on_first_page(self):
+        """只有封面页的图片 prompt 包含封面设计提示"""
+        cover = prompts.get_image_generation_prompt('desc', 'outline', 'sec', page_index=1)
+        body = prompts.get_image_generation_prompt('desc', 'outline', 'sec', page_index=2)
+
+        assert prompts._COVER_PAGE_IMAGE_NOTE in cover
+        assert prompts._COVER_PAGE_IMAGE_NOTE not in body
+
+    def test_refinement_prompt_puts_requirement_last(self, project_context):
+        """修改大纲 prompt 中用户要求位于最后一个片段"""
+        parts = prompts.get_outline_refinement_prompt(
+            SAMPLE_OUTLINE, '增加一页总结', project_context, language='zh'
+        )
+
+        assert parts[0] is prompts._OUTLINE_REFINEMENT_HEADER
+        assert '增加一页总结' in parts[-1]
+
+    def test_outline_headers_share_format_instructions(self):
+        """生成/解析/提取大纲的静态指令包含同一份格式说明"""
+        for header in (
+            prompts._OUTLINE_GENERATION_HEADER,
+            prompts._OUTLINE_PARSING_HEADER,
+            prompts._DESCRIPTION_TO_OUTLINE_HEADER,
+        ):
+            assert prompts._OUTLINE_FORMAT_INSTRUCTIONS in header
+
+
+class TestPromptRenderCache:
+    """项目上下文上的渲染缓存测试"""
+
+    def test_outline_text_refreshes_for_new_outline(self, project_context):
+        """传入新的大纲对象时重新序列化"""
+        prompts.get_page_description_prompt(project_context, SAMPLE_OUTLINE, SAMPLE_OUTLINE[0], 1)
+        new_outline = [{'title': '新的页面', 'points': []}]
+
+        parts = prompts.get_page_description_prompt(project_context, new_outline, new_outline[0], 1)
+
+        assert '新的页面' in parts[-1]
+        assert '图灵测试' not in parts[-1]
+
+    def test_reference_files_xml_is_reused_across_pages(self, project_context):
+        """参考文件 XML 在同一项目上下文中只生成一次"""
+        page1 = prompts.get_page_description_prompt(project_context, SAMPLE_OUTLINE, SAMPLE_OUTLINE[0], 1)
+        page2 = prompts.get_page_description_prompt(project_context, SAMPLE_OUTLINE, SAMPLE_OUTLINE[1], 2)
+
+        assert page1[1] is page2[1]
+        assert '参考资料内容' in page1[1]
+
+    def test_original_input_without_cache_fields(self):
+        """没有缓存字段的上下文对象也能渲染原始输入"""
+        context = SimpleNamespace(
+            idea_prompt='构想', outline_text='1. 起源', description_text=None, creation_type='outline',
+        )
+
+        assert prompts._get_original_input(context, 'page') == '用户提供的大纲：\n1. 起源'
+        assert prompts._get_original_input(context, 'refinement') == '- 用户提供的大纲文本：\n1. 起源\n'
+
+    def test_page_prompt_without_cache_fields(self, project_context):
+        """没有缓存字段的上下文对象与 ProjectContext 渲染出相同的 prompt"""
+        context = SimpleNamespace(**project_context.to_dict())
+
+        assert prompts.get_page_description_prompt(context, SAMPLE_OUTLINE, SAMPLE_OUTLINE[1], 2) == \
+            prompts.get_page_description_prompt(project_context, SAMPLE_OUTLINE, SAMPLE_OUTLINE[1], 2)
+
+
+class TestOutlineJson:
+    """大纲 JSON 序列化测试"""
+
+    def test_matches_stdlib_format(self):
+        """序列化结果与 json.dumps(ensure_ascii=False, indent=2) 一致"""
+        import json
+
+        outline = SAMPLE_OUTLINE + [{'part': '第二部分', 'pages': [{'title': '引号"测试"', 'points': []}]}]
+
+        assert prompts._dump_outline_json(outline) == json.dumps(outline, ensure_ascii=False, indent=2)
+
+    def test_large_int_falls_back_to_stdlib(self):
+        """超出 64 位的整数（orjson 不支持）回退到标准库序列化"""
+        import json
+
+        outline = [{'title': 't', 'points': [2 ** 64]}]
+
+        assert prompts._dump_outline_json(outline) == json.dumps(outline, ensure_ascii=False, indent=2)
+        prompts.get_outline_refinement_prompt(outline, '改短', ProjectContext({'idea_prompt': 'x'}))
+
+    def test_float_values_are_serialized(self):
+        """浮点数和 NaN 可以序列化，数值保持不变"""
+        import json
+        import math
+
+        text = prompts._dump_outline_json([{'title': 't', 'points': [1e20, 0.5, float('nan')]}])
+        points = json.loads(text)[0]['points']
+
+        assert points[:2] == [1e20, 0.5]
+        assert points[2] is None or math.isnan(points[2])
+
+
+class TestReferenceFilesXml:
+    """参考文件 XML 格式化测试"""
+
+    def test_empty_reference_files(self):
+        """没有参考文件时返回空字符串"""
+        assert prompts._format_reference_files_xml([]) == ""
+        assert prompts._format_reference_files_xml(None) == ""
+
+    def test_filename_and_content_are_escaped(self):
+        """文件名与内容中的结束标签被转义，不会破坏 XML 结构"""
+        xml = prompts._format_reference_files_xml([
+            {'filename': 'a"<b>.md', 'content': '</content> & more'},
+        ])
+
+        assert xml.startswith('<uploaded_files>\n')
+        assert xml.endswith('</uploaded_files>\n')
+        assert '<file name=\'a"&lt;b&gt;.md\'>' in xml
+        assert '&lt;/content> & more' in xml
+        assert xml.count('</content>') == 1
+
+    def test_markdown_content_is_kept_verbatim(self):
+        """内容中的 HTML 表格和带 & 的链接保持原样，只转义外层结构的结束标签"""
+        content = (
+            '<table><tr><td>A</td></tr></table>\n'
+            '![图](/files/mineru/a.png?x=1&y=2)\n'
+            '</file></uploaded_files>'
+        )
+
+        xml = prompts._format_reference_files_xml([{'filename': 'doc.md', 'content': content}])
+
+        assert '<table><tr><td>A</td></tr></table>' in xml
+        assert '/files/mineru/a.png?x=1&y=2' in xml
+        assert '&lt;/file>&lt;/uploaded_files>' in xml
+        assert xml.count('</file>') == 1
+        assert xml.count('</uploaded_files>') == 1
+
+
+class TestImageEditPrompt:
+    """图片编辑 prompt 测试"""
+
+    @pytest.mark.parametrize('marker', ['其他页面素材', 'Other page materials'])
+    def test_page_materials_are_stripped(self, marker):
+        """原始描述中"其他页面素材"之后的内容不会进入编辑 prompt"""
+        prompt = prompts.get_image_edit_prompt('改颜色', f'页面标题：x\n{marker}：![图](/files/a.png)')
+
+        assert '页面标题：x\n\n' in prompt
+        assert '/files/a.png' not in prompt